@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+逆变器发电量计算核心
+main.py（Streamlit 应用）与 simple_analysis.py（命令行版）共用的数值逻辑
+"""
+
+import ast
+import math
+import threading
+from functools import lru_cache
+
+import numpy as np
+from numba import config, njit, prange
+
+# 并行内核固定使用 workqueue 线程层：numba 装有 TBB 时默认优先选 TBB，
+# 而在非主线程（Streamlit 每个会话一个线程）中调用 TBB 并行内核后进程无法正常退出
+config.THREADING_LAYER = 'workqueue'
+
+# k 表达式中允许的运算与函数
+_K_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_K_UNARYOPS = (ast.UAdd, ast.USub)
+_K_FUNCS = {'abs': abs, 'sqrt': math.sqrt, 'exp': math.exp, 'log': math.log}
+
+def _check_k_node(node):
+    """校验 k 表达式语法树：只允许数字、λ（变量 L）、四则运算/幂、正负号和少量数学函数"""
+    if isinstance(node, ast.Expression):
+        return _check_k_node(node.body)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            return False
+        # 整数按浮点计算，避免 10**10**10 这类大整数幂长时间计算（浮点会直接溢出报错）
+        node.value = float(node.value)
+        return True
+    if isinstance(node, ast.Name):
+        return node.id == 'L'
+    if isinstance(node, ast.BinOp):
+        return isinstance(node.op, _K_BINOPS) and _check_k_node(node.left) and _check_k_node(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, _K_UNARYOPS) and _check_k_node(node.operand)
+    if isinstance(node, ast.Call):
+        return (
+            isinstance(node.func, ast.Name)
+            and node.func.id in _K_FUNCS
+            and not node.keywords
+            and all(_check_k_node(arg) for arg in node.args)
+        )
+    return False
+
+@lru_cache(maxsize=64)
+def compile_k(k_str):
+    """把k表达式预编译为 k(λ) 函数（按表达式缓存，同一表达式只解析/编译一次），容错：
+    - 支持 "^" 作为幂运算（转换为 **）
+    - 支持 abs/sqrt/exp/log 函数
+    - 当表达式中存在除以 λ 且 λ=0 时，使用极小正数代替避免报错
+    - 对于非法表达式（或求值出错），返回默认值 0.01
+    """
+    def default_k(lambda_val):
+        return 0.01
+
+    if k_str is None:
+        return default_k
+
+    # 预处理：去空格、支持 ^ 幂
+    expr = str(k_str).strip().replace(' ', '')
+    expr = expr.replace('^', '**')
+
+    # 纯数字直接返回常数（nan/inf 这类非有限值按非法表达式处理）
+    try:
+        value = float(expr)
+    except ValueError:
+        pass
+    else:
+        if not math.isfinite(value):
+            return default_k
+        return lambda lambda_val: value
+
+    # 用变量 L 统一替换 λ 的写法，解析为语法树并逐节点校验，不合法直接回退默认值
+    expr = expr.replace('lambda', 'L').replace('λ', 'L')
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError:
+        return default_k
+    if not _check_k_node(tree):
+        return default_k
+    code = compile(tree, '<k>', 'eval')
+
+    def k_func(lambda_val):
+        # 避免除零：当 λ=0 时，用极小正数替代以避免 1/0 报错
+        lam_safe = lambda_val if lambda_val != 0 else 1e-9
+        try:
+            # 语法树已校验，求值时也不提供任何内建
+            return float(eval(code, {"__builtins__": {}, **_K_FUNCS}, {'L': lam_safe}))
+        except Exception:
+            # 不报错给用户，直接使用默认值
+            return 0.01
+
+    return k_func
+
+# λ 截断到一位小数且 0 <= λ <= 1，只可能取 0.0, 0.1, ..., 1.0 共 11 个值
+K_TABLE_SIZE = 11
+
+def build_k_table(k_expression):
+    """预先对 λ 的 11 个可能取值求 k，表达式只编译一次，不在逐时刻循环中解析"""
+    k_func = compile_k(k_expression)
+    return np.array(
+        [k_func(j / 10) for j in range(K_TABLE_SIZE)],
+        dtype=np.float64
+    )
+
+# 定点数：计算内部以 0.1 kW（以及 0.1%、0.1 倍）为单位用 int64 表示，一位小数截断即整数运算
+FIXED_POINT_SCALE = 10
+
+@njit(cache=True, boundscheck=False)
+def _inverter_kernel(load10, initial_inv10, k_table):
+    """逐时刻递推的数值核心（numba 编译），全部按定点整数计算：
+    - load10、initial_inv10 及返回的各数组均为放大 10 倍后的 int64（比率 999.9 记为 9999）
+    - 整数加减与向下取整除法本身就是“截断一位小数”，无需 floor 调用
+    """
+    n = load10.shape[0]
+    inv_out = np.empty(n, dtype=np.int64)
+    percent_out = np.empty(n, dtype=np.int64)
+    inc_out = np.empty(n, dtype=np.int64)
+    aggr_out = np.empty(n, dtype=np.int64)
+    ratio_out = np.empty(n, dtype=np.int64)
+    lam_out = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return inv_out, percent_out, inc_out, aggr_out, ratio_out, lam_out
+
+    # 初值：按第一个负载做约束
+    inv_curr = min(max(0, initial_inv10), load10[0])
+
+    for i in range(n):
+        load_i = load10[i]
+
+        # 约束：当前时刻开始时先截断到当前负载范围
+        inv_curr = min(max(0, inv_curr), load_i)
+
+        # 购电、λ（λ×10 同时作为 k 表的下标）
+        grid_i = load_i - inv_curr
+        lam_i = 0 if load_i <= 0 else (grid_i * 10) // load_i
+        lam_i = min(max(lam_i, 0), K_TABLE_SIZE - 1)
+
+        # 逆变器发电调节量（Δt=1s）：k·λ²·负载，换算到 0.1 kW 为 k·lam_i²·load_i/100
+        inc_i = int(math.floor(k_table[lam_i] * (lam_i * lam_i) * load_i / 100.0))
+
+        # 激进调节量
+        aggressive_i = load_i - inv_curr
+
+        # 比率
+        if aggressive_i == 0:
+            ratio_i = 9999 if inc_i > 0 else 0
+        else:
+            ratio_i = (inc_i * 10) // aggressive_i
+
+        # 百分比
+        inv_percent_i = 0 if load_i <= 0 else (inv_curr * 1000) // load_i
+
+        inv_out[i] = inv_curr
+        percent_out[i] = inv_percent_i
+        inc_out[i] = inc_i
+        aggr_out[i] = aggressive_i
+        ratio_out[i] = ratio_i
+        lam_out[i] = lam_i
+
+        # 用本时刻的“调节量”更新下一时刻的逆变器发电量
+        inv_curr = inv_curr + inc_i
+
+        # 若下一时刻负载更小，导致当前更新后的逆变器发电量过大，则提前截断为下一时刻负载
+        if i + 1 < n:
+            next_load = load10[i + 1]
+            if inv_curr > next_load:
+                inv_curr = next_load
+
+    return inv_out, percent_out, inc_out, aggr_out, ratio_out, lam_out
+
+# 定点整数的安全上限：留出余量，保证内核中的乘法与累加不会溢出 int64
+_FIXED_POINT_LIMIT = 2.0 ** 52
+
+def _to_fixed(load, initial_inv, k_tables):
+    """把输入换算为内核使用的形式：负载与初始发电量截断为定点整数，k 表转为连续的 float64 数组
+    - 负载含空值/非数值、k 值非有限或数值超出定点范围时抛出 ValueError（不让非法值被转换成错误的整数）
+    - 初始发电量先截断到 [0, 最大负载]，过大的输入不会溢出
+    """
+    load = np.asarray(load, dtype=np.float64)
+    k_tables = np.ascontiguousarray(k_tables, dtype=np.float64)
+    initial_inv = float(initial_inv)
+
+    bad = ~np.isfinite(load)
+    if bad.any():
+        first = int(np.flatnonzero(bad)[0])
+        raise ValueError(
+            f"负载数据包含空值或非数值（共 {int(bad.sum())} 个，首个位于第 {first + 1} 个数据点），"
+            f"请检查所选时间范围内的数据"
+        )
+    if not np.isfinite(k_tables).all():
+        raise ValueError("k表达式的计算结果不是有限数值（如溢出为无穷大），请检查k表达式")
+    if not math.isfinite(initial_inv):
+        raise ValueError("初始逆变器发电量必须是有限数值")
+
+    # 调节量 = k·λ²·负载，λ ≤ 1，因此 |k|·负载 与 负载 本身都不能超出定点范围
+    max_load10 = float(np.abs(load).max()) * FIXED_POINT_SCALE if load.size else 0.0
+    max_k = float(np.abs(k_tables).max()) if k_tables.size else 0.0
+    if max_load10 >= _FIXED_POINT_LIMIT or max_load10 * max_k >= _FIXED_POINT_LIMIT:
+        raise ValueError("负载数据或k值过大，超出可计算范围")
+
+    # 内核会把初始发电量约束在 [0, 第一个负载] 内，先截断到 [0, 最大负载] 不改变结果，且保证转换不溢出
+    initial_inv = min(max(initial_inv, 0.0), float(load.max()) if load.size else 0.0)
+
+    load10 = np.floor(load * FIXED_POINT_SCALE).astype(np.int64)
+    initial_inv10 = int(math.floor(initial_inv * FIXED_POINT_SCALE))
+    return load10, initial_inv10, k_tables
+
+def _from_fixed(load10, inv, percent, inc, aggressive, ratio, lam):
+    """把内核输出的定点整数换回浮点数，按指标名组织为字典"""
+    return {
+        'load': load10 / FIXED_POINT_SCALE,
+        'inv_power': inv / FIXED_POINT_SCALE,
+        'inv_percent': percent / FIXED_POINT_SCALE,
+        'inc': inc / FIXED_POINT_SCALE,
+        'aggressive': aggressive / FIXED_POINT_SCALE,
+        'ratio': ratio / FIXED_POINT_SCALE,
+        'lambda': lam / FIXED_POINT_SCALE,
+    }
+
+def compute(load, initial_inv, k_table):
+    """对负载序列逐时刻递推，返回各指标数组（均已截断一位小数）
+    - load: 负载序列
+    - initial_inv: 初始逆变器发电量
+    - k_table: build_k_table 生成的 k(λ) 表
+    负载先一次性截断为一位小数（定点整数）再参与计算，结果只在输出时换回浮点数
+    """
+    load10, initial_inv10, k_table = _to_fixed(load, initial_inv, k_table)
+    return _from_fixed(load10, *_inverter_kernel(load10, initial_inv10, k_table))
+
+@njit(parallel=True, cache=True)
+def _inverter_sweep_kernel(load10, initial_inv10, k_tables):
+    """多组 k 表并行递推（各组相互独立，按组 prange 分配到多个核），
+    只返回发电百分比的二维 int64 数组（组 × 时刻）
+    """
+    n_k = k_tables.shape[0]
+    percent_out = np.empty((n_k, load10.shape[0]), dtype=np.int64)
+    for j in prange(n_k):
+        percent_out[j] = _inverter_kernel(load10, initial_inv10, k_tables[j])[1]
+    return percent_out
+
+# workqueue 线程层不支持多个线程同时调用并行内核（Streamlit 每个会话一个线程），调用需串行化
+_sweep_lock = threading.Lock()
+
+def compute_sweep(load, initial_inv, k_tables):
+    """对同一负载序列用多组 k 表（每行一个 build_k_table 结果）并行计算，
+    返回逆变器发电百分比的二维数组（行对应 k 表，列对应时刻，与 compute 的 inv_percent 一致）
+    """
+    load10, initial_inv10, k_tables = _to_fixed(load, initial_inv, np.atleast_2d(k_tables))
+    with _sweep_lock:
+        percent = _inverter_sweep_kernel(load10, initial_inv10, k_tables)
+    return percent / FIXED_POINT_SCALE
+
+# 导入时用极小输入触发一次编译（cache=True 时直接加载磁盘缓存），
+# 避免首次点击“开始计算”时才等待 JIT 编译
+compute(np.zeros(2), 0.0, np.full(K_TABLE_SIZE, 0.01))
@@ -27,12 +27,13 @@ def main():
         import pandas
         import matplotlib
         import numpy
+        import numba
         print("所有依赖包已安装")
     except ImportError:
         print("缺少必要依赖包，正在安装...")
         result = subprocess.run([
             sys.executable, "-m", "pip", "install", 
-            "streamlit", "pandas", "matplotlib", "numpy"
+            "streamlit", "pandas", "matplotlib", "numpy", "numba"
         ], capture_output=True, text=True)
         
         if result.returncode == 0:
@@ -6,8 +6,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import re
-import math
 import io
+import os
+import hashlib
+from inverter_core import build_k_table, compute, compute_sweep
 
 # 设置页面配置
 st.set_page_config(
@@ -40,11 +42,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def truncate_decimal(value, decimals=1):
-    """截断小数到指定位数（不四舍五入）"""
-    multiplier = 10 ** decimals
-    return math.floor(value * multiplier) / multiplier
-
 def parse_time_to_seconds(time_str):
     """将时间字符串转换为秒数"""
     try:
@@ -58,66 +55,57 @@ def parse_time_to_seconds(time_str):
     except:
         raise ValueError(f"无效的时间格式: {time_str}")
 
-def parse_k_expression(k_str, lambda_val):
-    """解析k表达式，容错：
-    - 支持 "^" 作为幂运算（转换为 **）
-    - 当表达式中存在除以 λ 且 λ=0 时，使用极小正数代替避免报错
-    - 对于非法表达式，返回默认值 0.01
+def _parse_csv_text(text):
+    """解析已解码的CSV文本：优先使用 PyArrow 引擎，失败（如存在坏行）时回退到 C 引擎并跳过坏行
+    - 只读取用到的前5列（时间戳、UTC时间、设备地址、设备类型、负载）
+    - 负载列转换为 float64，非数值（如 "--"、"N/A"）记为空值，只在落入计算范围时才报错
     """
+    # 先只读表头，确定列名
+    names = pd.read_csv(io.StringIO(text), nrows=0).columns
+    if len(names) < 5:
+        return pd.read_csv(io.StringIO(text), engine='c', on_bad_lines='skip')
+
+    options = dict(
+        parse_dates=[names[1]],
+        date_format='%Y-%m-%d %H:%M:%S'
+    )
     try:
-        if k_str is None:
-            return 0.01
-
-        # 预处理：去空格、支持 ^ 幂
-        expr = str(k_str).strip().replace(' ', '')
-        expr = expr.replace('^', '**')
-
-        # 纯数字直接返回
-        if expr.replace('.', '').replace('-', '').isdigit():
-            return float(expr)
-
-        # 避免除零：当 λ=0 时，用极小正数替代以避免 1/0 报错
-        lam_safe = lambda_val if lambda_val != 0 else 1e-9
-
-        # 用占位符替换，确保所有写法统一
-        expr = expr.replace('lambda', str(lam_safe))
-        expr = expr.replace('λ', str(lam_safe))
-
-        # 允许的字符集合（在替换后再校验）
-        allowed_chars = set('0123456789+-*/.()eE')
-        if not all(c in allowed_chars for c in expr):
-            # 若仍包含其它字符，直接回退默认值
-            return 0.01
-
-        # 安全求值：禁用内建，仅允许基本运算
-        result = eval(expr, {"__builtins__": None}, {})
-        return float(result)
+        df = pd.read_csv(
+            io.BytesIO(text.encode('utf-8')),
+            engine='pyarrow',
+            usecols=list(range(5)),
+            **options
+        )
     except Exception:
-        # 不报错给用户，直接使用默认值
-        return 0.01  # 默认值
+        # C 引擎在指定 usecols 时不会把多字段的行判为坏行，因此读全部列后再截取前5列
+        df = pd.read_csv(io.StringIO(text), engine='c', on_bad_lines='skip', **options)
+        df = df.iloc[:, :5]
+
+    # 不在解析时强制类型：个别非数值不应导致整个文件无法读取（否则会被误报为编码问题）
+    df[names[4]] = pd.to_numeric(df[names[4]], errors='coerce').astype(np.float64)
+    return df
 
 def read_csv_with_encoding(file_obj_or_path, user_encoding=None):
     """优先使用用户选择的编码；否则按常见中文编码优先尝试"""
+    # 只读取一次原始字节，各编码的尝试都在内存中进行
+    if hasattr(file_obj_or_path, 'read'):
+        if hasattr(file_obj_or_path, 'seek'):
+            file_obj_or_path.seek(0)
+        raw = file_obj_or_path.read()
+    else:
+        with open(file_obj_or_path, 'rb') as f:
+            raw = f.read()
+
     # 如果用户手动指定了编码，先用它
     if user_encoding and user_encoding != "自动检测(建议)":
-        return pd.read_csv(
-            file_obj_or_path,
-            encoding=user_encoding,
-            engine='python',
-            on_bad_lines='skip'
-        )
+        return _parse_csv_text(raw.decode(user_encoding))
 
     # 自动检测顺序：GBK/GB2312 优先，其次 UTF-8
     encodings = ['gbk', 'gb2312', 'utf-8-sig', 'utf-8', 'latin1']
     last_err = None
     for enc in encodings:
         try:
-            df = pd.read_csv(
-                file_obj_or_path,
-                encoding=enc,
-                engine='python',
-                on_bad_lines='skip'
-            )
+            df = _parse_csv_text(raw.decode(enc))
             if df.shape[1] >= 5:
                 return df
         except Exception as e:
@@ -125,28 +113,101 @@ def read_csv_with_encoding(file_obj_or_path, user_encoding=None):
             continue
     raise ValueError(f"无法读取CSV，请确认文件编码（建议GBK/GB2312）。最后错误：{last_err}")
 
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(file_bytes, user_encoding):
+    """按（文件内容, 编码）缓存解析结果，Streamlit 重跑时不再重复解析同一文件"""
+    return read_csv_with_encoding(io.BytesIO(file_bytes), user_encoding=user_encoding)
+
+# Parquet 缓存目录（仅缓存磁盘上的默认文件）
+PARQUET_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'load-analysis')
+
+@st.cache_data(show_spinner=False)
+def _read_parquet_cached(abs_path, mtime_ns, size, user_encoding):
+    """按（路径, 修改时间, 大小, 编码）缓存读取结果，Streamlit 重跑时不再重复读取 Parquet
+    - 缓存文件名为 “路径哈希_内容哈希.parquet”，写入新缓存时删除同一路径的旧缓存
+    """
+    path_key = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()
+    key_src = f"{abs_path}|{mtime_ns}|{size}|{user_encoding}"
+    key = hashlib.sha1(key_src.encode('utf-8')).hexdigest()
+    cache_name = f"{path_key}_{key}.parquet"
+    cache_path = os.path.join(PARQUET_CACHE_DIR, cache_name)
+
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path, engine='pyarrow')
+        except Exception:
+            # 缓存文件损坏时重新解析CSV
+            pass
+
+    df = read_csv_with_encoding(abs_path, user_encoding=user_encoding)
+    try:
+        os.makedirs(PARQUET_CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path, engine='pyarrow', compression='zstd', index=False)
+        # 同一文件修改后旧缓存不会再被命中，直接删除，避免缓存目录无限增长
+        for name in os.listdir(PARQUET_CACHE_DIR):
+            if name.startswith(f"{path_key}_") and name != cache_name:
+                os.remove(os.path.join(PARQUET_CACHE_DIR, name))
+    except Exception:
+        # 写缓存失败不影响本次分析
+        pass
+    return df
+
+def read_csv_with_parquet_cache(path, user_encoding=None):
+    """读取磁盘上的CSV，并将解析结果缓存为 Parquet；文件与编码未变时后续启动直接读取 Parquet"""
+    stat = os.stat(path)
+    return _read_parquet_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, user_encoding)
+
+def seconds_of_day(time_series):
+    """将时间列转换为当天的秒数（int64 数组，向量化计算；无法解析的时间记为 -1）"""
+    ts = pd.to_datetime(time_series, errors='coerce')
+    if ts.dt.tz is not None:
+        # 保留本地钟面时间，与 .dt.time 的取法一致
+        ts = ts.dt.tz_localize(None)
+    ns = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    seconds = (ns // 1_000_000_000) % 86400
+    return np.where(ts.isna().to_numpy(), -1, seconds)
+
+@st.cache_data(show_spinner=False)
+def _filter_by_seconds(df, start_seconds, end_seconds):
+    """按当天秒数区间过滤（纯计算，结果按输入缓存），同时返回过滤后各行的当天秒数"""
+    # 提取UTC时间列的时间部分（秒数），只解析一次，不写回 df
+    time_seconds = seconds_of_day(df.iloc[:, 1])
+    mask = (time_seconds >= start_seconds) & (time_seconds <= end_seconds)
+    # 只取用到的前5列，一次索引完成过滤与取列（loc 已返回新对象，无需再 copy）
+    return df.loc[mask, df.columns[:5]].reset_index(drop=True), time_seconds[mask]
+
 def filter_data_by_time(df, start_time, end_time):
-    """根据时间范围过滤数据"""
+    """根据时间范围过滤数据，返回 (过滤后的数据, 各行当天秒数)；失败时返回 (None, None)"""
     try:
         start_seconds = parse_time_to_seconds(start_time)
         end_seconds = parse_time_to_seconds(end_time)
         
-        # 提取UTC时间列的时间部分
-        df['time_only'] = pd.to_datetime(df.iloc[:, 1]).dt.time
-        df['time_seconds'] = df['time_only'].apply(lambda x: x.hour * 3600 + x.minute * 60 + x.second)
-        
-        # 过滤数据
-        filtered_df = df[(df['time_seconds'] >= start_seconds) & (df['time_seconds'] <= end_seconds)].copy()
+        filtered_df, time_seconds = _filter_by_seconds(df, start_seconds, end_seconds)
         
         if len(filtered_df) == 0:
             st.error("在指定时间范围内没有找到数据")
-            return None
+            return None, None
         
-        return filtered_df.reset_index(drop=True)
+        return filtered_df, time_seconds
     except Exception as e:
         st.error(f"时间过滤错误: {str(e)}")
-        return None
-
+        return None, None
+
+# 绘图点数上限：超过时等间隔抽样，减少传给浏览器的数据量
+MAX_PLOT_POINTS = 5000
+# 百分比图按值着色（colorscale）的点数上限：超过时改用单色标记
+COLORSCALE_MAX_POINTS = 2000
+
+def decimate(x, y, max_points=MAX_PLOT_POINTS):
+    """按固定步长抽样绘图数据，点数不超过 max_points 时原样返回"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    step = -(-len(x) // max_points)
+    return x[::step], y[::step]
+
+@st.cache_data(show_spinner=False)
 def calculate_inverter_power(df, initial_inv_power, k_expression):
     """按新逻辑计算：
     - 每个时刻 i：用当前负载 load_i 与当前逆变器发电量 inv_curr 计算 grid、λ、调节量、激进调节量、比例、百分比（均截断一位小数）
@@ -154,68 +215,34 @@ def calculate_inverter_power(df, initial_inv_power, k_expression):
     - 用调节量更新 inv_curr += 调节量，进入下一时刻
     - 每个时刻开始按当前负载做约束：inv_curr = min(max(0, inv_curr), load_i)
     """
-    results = []
-
     # 负载序列（第5列）
-    load_series = df.iloc[:, 4].astype(float).values
-
-    # 初值：按第一个负载做约束
-    inv_curr = min(max(0.0, float(initial_inv_power)), float(load_series[0]))
-
-    for i in range(len(load_series)):
-        load_i = float(load_series[i])
-
-        # 约束：当前时刻开始时先截断到当前负载范围
-        inv_curr = min(max(0.0, inv_curr), load_i)
-        inv_curr = truncate_decimal(inv_curr)
-
-        # 购电、λ
-        grid_i = truncate_decimal(load_i - inv_curr)
-        lam_i = truncate_decimal(0.0 if load_i <= 0 else grid_i / load_i)
-
-        # k(λ) 解析
-        k_val = parse_k_expression(k_expression, lam_i)
-
-        # 逆变器发电调节量（Δt=1s）
-        inc_i = k_val * (lam_i ** 2) * load_i * 1.0
-        inc_i = truncate_decimal(inc_i)
-
-        # 激进调节量
-        aggressive_i = truncate_decimal(load_i - inv_curr)
-
-        # 比率
-        if aggressive_i == 0:
-            ratio_i = 999.9 if inc_i > 0 else 0.0
-        else:
-            ratio_i = truncate_decimal(inc_i / aggressive_i)
-
-        # 百分比
-        inv_percent_i = truncate_decimal(0.0 if load_i <= 0 else (inv_curr / load_i) * 100.0)
-
-        # 记录（中文标题 + 不变列）
-        results.append({
-            '时间戳': df.iloc[i, 0],
-            'UTC时间': df.iloc[i, 1],
-            '设备地址': df.iloc[i, 2],
-            '设备类型': df.iloc[i, 3],
-            '负载数据': truncate_decimal(load_i),
-            '逆变器发电量': inv_curr,
-            '逆变器发电量占负载的百分比': inv_percent_i,
-            '逆变器发电调节量': inc_i,
-            '激进调节量': aggressive_i,
-            '逆变器发电调节量/激进调节量': ratio_i,
-        })
-
-        # 用本时刻的“调节量”更新下一时刻的逆变器发电量
-        inv_curr = inv_curr + inc_i
-
-        # 新增：若下一时刻负载更小，导致当前更新后的逆变器发电量过大，则提前截断为下一时刻负载
-        if i + 1 < len(load_series):
-            next_load = float(load_series[i + 1])
-            if inv_curr > next_load:
-                inv_curr = truncate_decimal(next_load)
-
-    return pd.DataFrame(results)
+    load_series = df.iloc[:, 4].to_numpy(dtype=np.float64)
+
+    out = compute(load_series, initial_inv_power, build_k_table(k_expression))
+
+    # 不变列整块切片（改用中文标题），计算结果按列写入连续的 float64 数组；列顺序即表格显示顺序
+    results_df = df.iloc[:, 0:4].reset_index(drop=True).copy()
+    results_df.columns = ['时间戳', 'UTC时间', '设备地址', '设备类型']
+    results_df['负载数据'] = out['load']
+    results_df['逆变器发电量'] = out['inv_power']
+    results_df['逆变器发电量占负载的百分比'] = out['inv_percent']
+    results_df['逆变器发电调节量'] = out['inc']
+    results_df['激进调节量'] = out['aggressive']
+    results_df['逆变器发电调节量/激进调节量'] = out['ratio']
+    return results_df
+
+@st.cache_data(show_spinner=False)
+def calculate_inverter_power_sweep(df, initial_inv_power, k_expressions):
+    """对多个k表达式并行计算，返回各表达式下的逆变器发电百分比（列名为表达式，行对应时刻）"""
+    load_series = df.iloc[:, 4].to_numpy(dtype=np.float64)
+    k_tables = np.array([build_k_table(k) for k in k_expressions])
+    percent = compute_sweep(load_series, initial_inv_power, k_tables)
+    return pd.DataFrame(percent.T, columns=list(k_expressions))
+
+@st.cache_data(show_spinner=False)
+def _to_csv_bytes(df):
+    """把结果序列化为带 BOM 的 UTF-8 CSV 字节（按结果缓存，相同结果不重复序列化）"""
+    return df.to_csv(index=False).encode('utf-8-sig')
 
 def main():
     st.markdown('<h1 class="main-header">🤖 负载数据分析系统</h1>', unsafe_allow_html=True)
@@ -237,10 +264,17 @@ def main():
         help="请上传包含负载数据的CSV文件"
     )
 
+    # 默认文件的 Parquet 缓存（可选）
+    use_parquet_cache = st.sidebar.checkbox(
+        "缓存默认文件为Parquet",
+        value=False,
+        help="首次读取默认文件后保存为 Parquet，后续启动直接加载，速度更快（仅对默认文件生效）"
+    )
+
     if uploaded_file is not None:
         try:
-            # uploaded_file 为文件对象，可直接传入
-            df = read_csv_with_encoding(uploaded_file, user_encoding=encoding_choice)
+            # 按文件内容缓存，参数调整引起的重跑不会重复解析CSV
+            df = _read_csv_cached(uploaded_file.getvalue(), encoding_choice)
             st.sidebar.success(f"成功读取文件，共 {len(df)} 行数据")
             st.sidebar.markdown("**文件列名：**")
             for i, col in enumerate(df.columns):
@@ -251,7 +285,12 @@ def main():
     else:
         # 使用默认文件（含中文路径/文件名）
         try:
-            df = read_csv_with_encoding("500KW不同模式的测试数据（负载）.csv", user_encoding=encoding_choice)
+            default_path = "500KW不同模式的测试数据（负载）.csv"
+            if use_parquet_cache:
+                df = read_csv_with_parquet_cache(default_path, user_encoding=encoding_choice)
+            else:
+                with open(default_path, 'rb') as f:
+                    df = _read_csv_cached(f.read(), encoding_choice)
             st.sidebar.success(f"使用默认文件，共 {len(df)} 行数据")
         except Exception as e:
             st.error(f"无法读取默认文件: {str(e)}")
@@ -292,12 +331,30 @@ def main():
         value="0.01",
         help="支持常数或关于λ的表达式，如: 0.01, 0.01*λ, 0.01*λ^2"
     )
+
+    # 多个k表达式对比（可选）：并行计算，结果画在同一张图中
+    # 选项列表保持固定并指定 key：选项随k表达式变化会改变控件ID，导致已选内容被清空
+    k_presets = ["0.005", "0.01", "0.02", "0.05", "0.01*λ", "0.01*λ^2"]
+    k_compare = st.sidebar.multiselect(
+        "k表达式对比",
+        k_presets,
+        default=[],
+        key="k_compare",
+        help="选择多个k表达式，在同一张图中对比逆变器发电百分比"
+    )
+    compare_current = st.sidebar.checkbox(
+        "对比中包含当前k表达式",
+        value=True,
+        key="k_compare_current"
+    )
+    if k_compare and compare_current:
+        k_compare = [k_expression] + [k for k in k_compare if k != k_expression]
     
     # 计算按钮
     if st.sidebar.button("🚀 开始计算", type="primary"):
         try:
             # 过滤数据
-            filtered_df = filter_data_by_time(df, start_time, end_time)
+            filtered_df, time_seconds = filter_data_by_time(df, start_time, end_time)
             if filtered_df is None:
                 return
             
@@ -327,37 +384,43 @@ def main():
             # 可视化
             st.markdown('<h2 class="section-header">📊 可视化图表</h2>', unsafe_allow_html=True)
             
-            # 创建时间轴（转换为秒，确保为整数）
-            time_seconds = []
-            for i, time_str in enumerate(results_df['UTC时间']):
-                time_obj = pd.to_datetime(time_str).time()
-                seconds = time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
-                time_seconds.append(int(seconds))
-
-            # 绘图前统一做一位小数“截断”，避免浮点微差导致视觉高度差异
-            def trunc_series(s):
-                return pd.to_numeric(s, errors='coerce').apply(lambda v: truncate_decimal(float(v)))
-
-            y_percent = trunc_series(results_df['逆变器发电量占负载的百分比'])
-            y_load = trunc_series(results_df['负载数据'])
-            y_inv = trunc_series(results_df['逆变器发电量'])
-            y_inc = trunc_series(results_df['逆变器发电调节量'])
+            # 计算结果已按一位小数截断，可直接绘图
+            y_percent = results_df['逆变器发电量占负载的百分比']
+            y_load = results_df['负载数据']
+            y_inv = results_df['逆变器发电量']
+            y_inc = results_df['逆变器发电调节量']
+
+            # 长时间范围：抽样到 MAX_PLOT_POINTS 个点以内，并只画线（标记点渲染开销大）
+            large_plot = len(time_seconds) > MAX_PLOT_POINTS
+            plot_mode = 'lines' if large_plot else 'lines+markers'
+            x_plot, y_percent = decimate(time_seconds, y_percent)
+            _, y_load = decimate(time_seconds, y_load)
+            _, y_inv = decimate(time_seconds, y_inv)
+            _, y_inc = decimate(time_seconds, y_inc)
+            # 长时间范围用 WebGL 渲染，比 SVG 快得多
+            scatter = go.Scattergl if large_plot else go.Scatter
+
+            # 点多时逐点着色开销大，且折线已能反映数值变化，改用单色小标记
+            if len(y_percent) > COLORSCALE_MAX_POINTS:
+                percent_marker = dict(size=4, color='#1f77b4')
+            else:
+                percent_marker = dict(
+                    size=6,
+                    color=y_percent,
+                    colorscale='Viridis',
+                    showscale=True,
+                    colorbar=dict(title="百分比 (%)")
+                )
             
             # 逆变器发电量百分比散点图
             fig = go.Figure()
             
-            fig.add_trace(go.Scatter(
-                x=time_seconds,
+            fig.add_trace(scatter(
+                x=x_plot,
                 y=y_percent,
-                mode='markers+lines',
+                mode=plot_mode,
                 name='逆变器发电百分比',
-                marker=dict(
-                    size=6,
-                    color=y_percent,
-                    colorscale='Viridis',
-                    showscale=True,
-                    colorbar=dict(title="百分比 (%)")
-                ),
+                marker=percent_marker,
                 line=dict(width=2)
             ))
             
@@ -370,16 +433,16 @@ def main():
                 height=500
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, config={'responsive': True})
             
             # 多指标对比图：负载数据、逆变器发电量、发电量增加量
             fig2 = go.Figure()
 
             # 1) 先画“发电量增加量”——最不显著，放最底层，马卡龙浅色
-            fig2.add_trace(go.Scatter(
-                x=time_seconds,
+            fig2.add_trace(scatter(
+                x=x_plot,
                 y=y_inc,
-                mode='lines+markers',
+                mode=plot_mode,
                 name='发电量增加量 (kW)',
                 yaxis='y2',
                 line=dict(color='#FFDAC1', width=2),  # 马卡龙浅桃色
@@ -388,10 +451,10 @@ def main():
             ))
 
             # 2) 再画“逆变器发电量”——次显著，马卡龙浅蓝绿
-            fig2.add_trace(go.Scatter(
-                x=time_seconds,
+            fig2.add_trace(scatter(
+                x=x_plot,
                 y=y_inv,
-                mode='lines+markers',
+                mode=plot_mode,
                 name='逆变器发电量 (kW)',
                 yaxis='y',
                 line=dict(color='#A0CED9', width=2.5),  # 马卡龙浅青蓝
@@ -400,10 +463,10 @@ def main():
             ))
 
             # 3) 最后画“负载数据”——最显著，置顶，马卡龙浅粉
-            fig2.add_trace(go.Scatter(
-                x=time_seconds,
+            fig2.add_trace(scatter(
+                x=x_plot,
                 y=y_load,
-                mode='lines+markers',
+                mode=plot_mode,
                 name='负载数据 (kW)',
                 yaxis='y',
                 line=dict(color='#FF9AA2', width=3.5),  # 马卡龙浅粉
@@ -422,24 +485,45 @@ def main():
                 legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
             )
             
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(fig2, use_container_width=True, config={'responsive': True})
+
+            # 多个k表达式下的发电百分比对比
+            if k_compare:
+                with st.spinner("正在计算k表达式对比..."):
+                    sweep_df = calculate_inverter_power_sweep(filtered_df, initial_inv_power, tuple(k_compare))
+
+                fig3 = go.Figure()
+                for k in sweep_df.columns:
+                    _, y_k = decimate(time_seconds, sweep_df[k])
+                    fig3.add_trace(scatter(
+                        x=x_plot,
+                        y=y_k,
+                        mode='lines',
+                        name=f'k = {k}',
+                        line=dict(width=2)
+                    ))
+
+                fig3.update_layout(
+                    title='不同k表达式下逆变器发电量占负载百分比对比',
+                    xaxis_title='时间 (秒)',
+                    yaxis_title='发电百分比 (%)',
+                    hovermode='x unified',
+                    width=900,
+                    height=500
+                )
+
+                st.plotly_chart(fig3, use_container_width=True, config={'responsive': True})
             
             # 数据表格
             st.markdown('<h2 class="section-header">📋 详细数据表</h2>', unsafe_allow_html=True)
             
-            # 选择显示的列
-            display_columns = [
-                '时间戳', 'UTC时间', '设备地址', '设备类型', '负载数据', '逆变器发电量',
-                '逆变器发电量占负载的百分比', '逆变器发电调节量', '激进调节量', '逆变器发电调节量/激进调节量'
-            ]
-            
-            st.dataframe(results_df[display_columns], use_container_width=True, height=400)
+            # results_df 的列已按显示顺序生成，直接展示，不再做列投影（避免整表复制）
+            st.dataframe(results_df, use_container_width=True, height=400, hide_index=True)
             
             # 下载CSV
-            csv_data = results_df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="📥 下载结果CSV文件",
-                data=csv_data,
+                data=_to_csv_bytes(results_df),
                 file_name=f"计算结果_{start_time.replace(':', '')}_{end_time.replace(':', '')}.csv",
                 mime="text/csv"
             )
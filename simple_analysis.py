@@ -1,26 +1,14 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import math
 from datetime import datetime
 
+from inverter_core import build_k_table, compute
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
 plt.rcParams['axes.unicode_minus'] = False
 
-def truncate_decimal(value, decimals=1):
-    """截断小数到指定位数（不四舍五入）"""
-    multiplier = 10 ** decimals
-    return math.floor(value * multiplier) / multiplier
-
-def parse_k_expression(k_str, lambda_val):
-    """解析k表达式"""
-    try:
-        k_str = k_str.replace(' ', '').replace('λ', str(lambda_val))
-        return float(eval(k_str))
-    except:
-        return 0.01
-
 def analyze_load_data(csv_file, start_time, end_time, initial_inv_power, k_expression):
     """分析负载数据的主函数"""
     
@@ -35,63 +23,29 @@ def analyze_load_data(csv_file, start_time, end_time, initial_inv_power, k_expre
     
     print(f"成功读取文件，共 {len(df)} 行数据")
     
-    # 时间过滤
-    df['time_only'] = pd.to_datetime(df.iloc[:, 1]).dt.time
+    # 时间过滤（在 int64 纳秒值上直接计算当天秒数，不逐行调用 Python 函数）
     start_seconds = sum(x * int(t) for x, t in zip([3600, 60, 1], start_time.split(':')))
     end_seconds = sum(x * int(t) for x, t in zip([3600, 60, 1], end_time.split(':')))
     
-    df['time_seconds'] = df['time_only'].apply(lambda x: x.hour * 3600 + x.minute * 60 + x.second)
-    filtered_df = df[(df['time_seconds'] >= start_seconds) & (df['time_seconds'] <= end_seconds)].copy()
+    ts_ns = pd.to_datetime(df.iloc[:, 1], format='%Y-%m-%d %H:%M:%S').to_numpy(dtype='datetime64[ns]').view(np.int64)
+    sec = (ts_ns // 1_000_000_000) % 86400
+    mask = (sec >= start_seconds) & (sec <= end_seconds)
+    filtered_df = df.loc[mask].reset_index(drop=True)
     
     print(f"时间过滤后，共 {len(filtered_df)} 行数据")
     
-    # 计算逆变器发电量
-    results = []
-    load_data = filtered_df.iloc[:, 4].values
-    
-    # 第一个时间戳
-    load0 = load_data[0]
-    inv_power0 = min(max(0, initial_inv_power), load0)
-    grid_power0 = load0 - inv_power0
-    lambda0 = truncate_decimal(grid_power0 / load0 if load0 > 0 else 0)
-    
-    results.append({
-        'time': filtered_df.iloc[0, 1],
-        'load': load0,
-        'inv_power': truncate_decimal(inv_power0),
-        'inv_percent': truncate_decimal((inv_power0 / load0) * 100 if load0 > 0 else 0),
-        'lambda': lambda0
-    })
-    
-    # 后续时间戳
-    prev_lambda = lambda0
-    prev_inv_power = inv_power0
-    
-    for i in range(1, len(load_data)):
-        load_i = load_data[i]
-        k = parse_k_expression(k_expression, prev_lambda)
-        
-        inc_inv_i = truncate_decimal(k * (prev_lambda ** 2) * load_i)
-        inv_power_i = truncate_decimal(min(max(0, prev_inv_power + inc_inv_i), load_i))
-        
-        grid_power_i = truncate_decimal(load_i - inv_power_i)
-        lambda_i = truncate_decimal(grid_power_i / load_i if load_i > 0 else 0)
-        
-        inv_percent_i = truncate_decimal((inv_power_i / load_i) * 100 if load_i > 0 else 0)
-        
-        results.append({
-            'time': filtered_df.iloc[i, 1],
-            'load': load_i,
-            'inv_power': inv_power_i,
-            'inv_percent': inv_percent_i,
-            'lambda': lambda_i
-        })
-        
-        prev_lambda = lambda_i
-        prev_inv_power = inv_power_i
+    # 计算逆变器发电量（与 Web 版共用同一计算核心）
+    load_data = filtered_df.iloc[:, 4].to_numpy(dtype=np.float64)
+    out = compute(load_data, initial_inv_power, build_k_table(k_expression))
     
     # 创建结果DataFrame
-    results_df = pd.DataFrame(results)
+    results_df = pd.DataFrame({
+        'time': filtered_df.iloc[:, 1].to_numpy(),
+        'load': out['load'],
+        'inv_power': out['inv_power'],
+        'inv_percent': out['inv_percent'],
+        'lambda': out['lambda']
+    })
     
     # 可视化
     plt.figure(figsize=(12, 8))